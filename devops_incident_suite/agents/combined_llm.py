@@ -0,0 +1,132 @@
+"""Combined LLM Agent — runs risk assessment, causal analysis and the Slack summary in one call."""
+
+from __future__ import annotations
+
+import json
+import re
+
+from langchain_core.messages import SystemMessage, HumanMessage
+
+from agents import notification, predictive_risk, root_cause
+from utils.llm_text import FENCE_RE
+
+
+RISK_MARKER = "===RISK_JSON==="
+CHAINS_MARKER = "===CHAINS_JSON==="
+SLACK_MARKER = "===SLACK_MD==="
+
+SYSTEM_PROMPT = f"""\
+You are the analysis stage of a DevOps incident analysis pipeline.
+
+The input contains up to three tasks, each introduced by its own section header.
+Complete every task that is present and reply with one output section per task,
+each starting with its marker on a line by itself.
+
+TASK 1 — Predictive risk (input: "Escalation signals")
+Assess each detected escalation signal and predict what will happen next if no
+action is taken. Return a JSON array of objects with keys:
+{predictive_risk.RISK_FIELDS}
+Risk levels:
+{predictive_risk.RISK_LEVEL_GUIDELINES}
+Output under {RISK_MARKER}. Return [] if no risks are predicted.
+
+TASK 2 — Root cause correlation (input: "Event clusters" and "Known issues")
+Identify directed causal chains in the clusters of temporally-close,
+cross-referenced events. Return a JSON array of objects with keys:
+{root_cause.CHAIN_FIELDS}
+Confidence levels:
+{root_cause.CONFIDENCE_GUIDELINES}
+Output under {CHAINS_MARKER}. Return [] if the events are independent.
+
+TASK 3 — Slack notification (input: "Notification findings")
+Write a concise Slack markdown summary:
+{notification.SLACK_FORMAT_RULES.format(risk_source="TASK 1 produced HIGH-risk predictions")}
+Output under {SLACK_MARKER}.
+
+JSON sections must contain ONLY valid JSON — no markdown code fences.
+Do not add any text outside the marked sections.
+"""
+
+_SECTION_RE = re.compile(
+    r"^\s*(" + "|".join(re.escape(m) for m in (RISK_MARKER, CHAINS_MARKER, SLACK_MARKER)) + r")\s*$",
+    re.MULTILINE,
+)
+
+
+def _split_sections(text: str) -> dict[str, str]:
+    """Split the batched response into {marker: body}."""
+    parts = _SECTION_RE.split(text)
+    # parts = [preamble, marker, body, marker, body, ...]
+    return {parts[i]: parts[i + 1] for i in range(1, len(parts) - 1, 2)}
+
+
+def run(state: dict, llm) -> dict:
+    """Run the risk, root-cause and notification LLM tasks as a single batched request."""
+    log_entries = state.get("log_entries", [])
+    issues = state.get("issues", [])
+
+    # Deterministic pre-processing from each agent
+    signals = predictive_risk.collect_signals(log_entries) if log_entries else []
+    candidates = root_cause.collect_candidates(log_entries) if log_entries else []
+
+    # A lone non-urgent issue with no escalation signals (so no HIGH risk to
+    # forecast) gets a templated Slack summary instead of an LLM task
+    templated_slack = notification.can_template(issues) and not signals
+
+    sections = []
+    if signals:
+        signals_text = json.dumps(signals, separators=(",", ":"), default=str)
+        sections.append(f"## Escalation signals\n{signals_text}")
+    if candidates:
+        candidates_text = json.dumps(candidates, separators=(",", ":"), default=str)
+        issues_text = json.dumps(issues[:10], separators=(",", ":"), default=str) if issues else "[]"
+        sections.append(
+            f"## Event clusters\n{candidates_text}\n\n## Known issues\n{issues_text}"
+        )
+    if issues and not templated_slack:
+        # HIGH risks for the forecast come from TASK 1 of this same request
+        context_data = notification.build_context(state, include_risks=False)
+        context = json.dumps(context_data, separators=(",", ":"), default=str)
+        sections.append(f"## Notification findings\n{context}")
+
+    result = {"risk_predictions": [], "causal_chains": []}
+    if not issues:
+        result.update(notification.no_issues_result())
+    elif templated_slack:
+        result.update(notification.deliver(notification.template_summary(issues[0])))
+
+    if sections:
+        response = llm.invoke([
+            SystemMessage(content=SYSTEM_PROMPT),
+            HumanMessage(content="\n\n".join(sections)),
+        ])
+        text = response.content.strip()
+        if text.startswith("```"):
+            # Whole reply wrapped in one fence; the JSON sections strip their own
+            text = FENCE_RE.sub("", text)
+        outputs = _split_sections(text)
+
+        errors = []
+        for present, marker, parse in (
+            (signals, RISK_MARKER, predictive_risk.parse_response),
+            (candidates, CHAINS_MARKER, root_cause.parse_response),
+        ):
+            if present:
+                update = parse(outputs.get(marker, ""))
+                if update.get("error"):
+                    errors.append(update["error"])
+                result.update(update)
+
+        if issues and not templated_slack:
+            slack_text = outputs.get(SLACK_MARKER, "").strip()
+            if slack_text:
+                result.update(notification.deliver(slack_text))
+            else:
+                errors.append("Combined agent returned no Slack summary")
+                result.update(notification.deliver(notification.fallback_summary(issues)))
+
+        if errors:
+            result["error"] = "; ".join(errors)
+
+    result["current_agent"] = "combined_llm"
+    return result
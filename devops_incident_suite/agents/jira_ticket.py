@@ -3,11 +3,11 @@
 from __future__ import annotations
 
 import json
-import re
 
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from models.schemas import TicketPriority
+from utils.llm_text import FENCE_RE
 
 
 SYSTEM_PROMPT = """\
@@ -49,8 +49,7 @@ def run(state: dict, llm) -> dict:
 
     text = response.content.strip()
     if text.startswith("```"):
-        text = re.sub(r"^```\w*\n?", "", text)
-        text = re.sub(r"\n?```$", "", text)
+        text = FENCE_RE.sub("", text)
 
     try:
         parsed = json.loads(text)
@@ -4,10 +4,12 @@ from __future__ import annotations
 
 import json
 import re
+import sys
 
 from langchain_core.messages import SystemMessage, HumanMessage
 
 from models.schemas import LogEntry, LogLevel, PipelineState
+from utils.llm_text import FENCE_RE
 
 
 SYSTEM_PROMPT = """\
@@ -79,7 +81,7 @@ def _try_regex_parse(lines: list[str]) -> list[LogEntry] | None:
                         line_number=i,
                         timestamp=m.group("timestamp").strip(),
                         level=_parse_level(m.group("level")),
-                        service=m.group("service") or "unknown",
+                        service=sys.intern(m.group("service") or "unknown"),
                         message=m.group("message").strip(),
                         raw=line,
                     )
@@ -96,8 +98,7 @@ def _parse_llm_response(response_text: str, raw_lines: list[str]) -> list[LogEnt
     # Strip markdown code fences if present
     text = response_text.strip()
     if text.startswith("```"):
-        text = re.sub(r"^```\w*\n?", "", text)
-        text = re.sub(r"\n?```$", "", text)
+        text = FENCE_RE.sub("", text)
 
     parsed = json.loads(text)
     entries = []
@@ -4,73 +4,121 @@ from __future__ import annotations
 
 import json
 import os
+from functools import lru_cache
 
 from langchain_core.messages import SystemMessage, HumanMessage
 
+from utils.results_store import SEVERITY_ORDER
 from utils.slack_client import send_slack_message
 
 
+@lru_cache(maxsize=1)
 def _get_channel() -> str:
+    # Resolved lazily (after graph.py's load_dotenv) and fixed for the process
     return os.getenv("SLACK_CHANNEL", "#new-channel")
 
 
-SYSTEM_PROMPT = """\
+# Slack formatting rules, shared with the combined agent's prompt; `{risk_source}`
+# says where the HIGH-risk predictions for the forecast come from
+SLACK_FORMAT_RULES = """\
+- Lead with an attention-grabbing header based on the highest severity
+- List the top issues (max 5) with severity and recommended action
+- Keep each issue and its details compact — no blank line between an issue title and its details
+- Put a blank line between separate issues for readability
+- Include a link placeholder for the full cookbook
+- If {risk_source}, add a "Risk Forecast" section after the issues listing the HIGH-risk predictions with their preventive actions
+- Keep it scannable — ops engineers are busy"""
+
+SYSTEM_PROMPT = f"""\
 You are a Notification Agent for a DevOps incident analysis pipeline.
 
 You receive a list of detected issues and a remediation cookbook.
 Your job is to create a concise Slack notification summary.
 
 Format the message for Slack using markdown:
-- Lead with an attention-grabbing header based on the highest severity
-- List the top issues (max 5) with severity and recommended action
-- Keep each issue and its details compact — no blank line between an issue title and its details
-- Put a blank line between separate issues for readability
-- Include a link placeholder for the full cookbook
-- If risk predictions are provided, add a "Risk Forecast" section after the issues listing the HIGH-risk predictions with their preventive actions
-- Keep it scannable — ops engineers are busy
+{SLACK_FORMAT_RULES.format(risk_source="risk predictions are provided")}
 
 Return ONLY the notification text (Slack markdown). No JSON wrapping.
 """
 
 
-def run(state: dict, llm) -> dict:
-    """Format a Slack notification and optionally send it."""
+def build_context(state: dict, include_risks: bool = True) -> dict:
+    """Collect the issues, cookbook preview and HIGH risks the Slack summary is written from.
+
+    Risk predictions are only in the state when predictive_risk ran before
+    this agent; the combined agent predicts them in the same request, so it
+    passes `include_risks=False`.
+    """
     issues = state.get("issues", [])
     cookbook = state.get("cookbook", "")
 
-    if not issues:
-        return {
-            "notification": {
-                "channel": _get_channel(),
-                "summary": "No actionable issues detected.",
-                "payload": {},
-                "sent": False,
-                "mode": "dry-run",
-            },
-            "current_agent": "notification",
-        }
+    context_data = {"issues": issues, "cookbook_preview": cookbook[:500]}
 
     # Include HIGH risk predictions if available
-    risk_predictions = state.get("risk_predictions", [])
-    high_risks = [r for r in risk_predictions if r.get("risk_level") == "HIGH"]
+    if include_risks:
+        risk_predictions = state.get("risk_predictions", [])
+        high_risks = [r for r in risk_predictions if r.get("risk_level") == "HIGH"]
+        if high_risks:
+            context_data["risk_predictions"] = high_risks
 
-    context_data = {"issues": issues, "cookbook_preview": cookbook[:500]}
-    if high_risks:
-        context_data["risk_predictions"] = high_risks
+    return context_data
 
-    context = json.dumps(context_data, indent=2, default=str)
 
-    response = llm.invoke([
-        SystemMessage(content=SYSTEM_PROMPT),
-        HumanMessage(
-            content=f"Create a Slack notification for these findings:\n\n{context}"
-        ),
-    ])
+# Issues urgent enough to always get an LLM-written summary
+_URGENT_SEVERITIES = frozenset({"CRITICAL", "HIGH"})
+
+
+def can_template(issues: list[dict]) -> bool:
+    """True when the findings are a single non-urgent issue that `template_summary` can cover."""
+    return len(issues) == 1 and issues[0].get("severity") not in _URGENT_SEVERITIES
+
+
+def template_summary(issue: dict) -> str:
+    """Slack summary for a single issue, built without an LLM call."""
+    severity = issue.get("severity", "LOW")
+    return (
+        f"*{severity} incident detected*\n"
+        f"• *{issue.get('issue', 'Unknown issue')}* ({severity})\n"
+        f"  Recommended action: {issue.get('recommended_fix', 'See the remediation cookbook')}\n\n"
+        "Full remediation cookbook: [link]"
+    )
+
 
-    summary_text = response.content.strip()
+def fallback_summary(issues: list[dict]) -> str:
+    """Plain Slack summary of the top issues, for when no LLM summary is available."""
+    severities = [issue.get("severity", "LOW") for issue in issues]
+    top = min(severities, key=lambda sev: SEVERITY_ORDER.get(sev, 4))
+    lines = [f"*{top} — {len(issues)} issue(s) detected*"]
+    for issue, severity in list(zip(issues, severities))[:5]:
+        lines.append(
+            f"• *{issue.get('issue', 'Unknown issue')}* ({severity})\n"
+            f"  Recommended action: {issue.get('recommended_fix', 'See the remediation cookbook')}"
+        )
+    lines.append("Full remediation cookbook: [link]")
+    return "\n\n".join(lines)
+
+
+def no_issues_result() -> dict:
+    """State update for a run with nothing to notify about."""
+    return {
+        "notification": {
+            "channel": _get_channel(),
+            "summary": "No actionable issues detected.",
+            "payload": {},
+            "sent": False,
+            "mode": "dry-run",
+        },
+        "current_agent": "notification",
+    }
+
+
+def deliver(summary_text: str) -> dict:
+    """Wrap the summary in a Slack payload, try to send it, and return the state update."""
+    summary_text = summary_text.strip()
+    channel = _get_channel()
 
     payload = {
-        "channel": _get_channel(),
+        "channel": channel,
         "text": summary_text,
         "blocks": [
             {
@@ -85,7 +133,7 @@ def run(state: dict, llm) -> dict:
 
     return {
         "notification": {
-            "channel": _get_channel(),
+            "channel": channel,
             "summary": summary_text,
             "payload": payload,
             "sent": sent,
@@ -93,3 +141,27 @@ def run(state: dict, llm) -> dict:
         },
         "current_agent": "notification",
     }
+
+
+def run(state: dict, llm) -> dict:
+    """Format a Slack notification and optionally send it."""
+    issues = state.get("issues", [])
+    if not issues:
+        return no_issues_result()
+
+    context_data = build_context(state)
+
+    # A lone non-urgent issue with no HIGH risks to forecast doesn't need the LLM
+    if can_template(issues) and "risk_predictions" not in context_data:
+        return deliver(template_summary(issues[0]))
+
+    context = json.dumps(context_data, separators=(",", ":"), default=str)
+
+    response = llm.invoke([
+        SystemMessage(content=SYSTEM_PROMPT),
+        HumanMessage(
+            content=f"Create a Slack notification for these findings:\n\n{context}"
+        ),
+    ])
+
+    return deliver(response.content)
@@ -7,10 +7,33 @@ import re
 from collections import defaultdict
 from datetime import datetime
 
+import numpy as np
 from langchain_core.messages import SystemMessage, HumanMessage
 
+try:
+    from numba import njit
+except ImportError:  # optional: fall back to the numpy kernel below
+    njit = None
 
-SYSTEM_PROMPT = """\
+from utils.llm_text import FENCE_RE
+from utils.timestamps import parse_timestamp
+
+
+# Output schema and risk levels, shared with the combined agent's prompt
+RISK_FIELDS = """\
+- service: affected service name
+- risk_level: HIGH, MEDIUM, or LOW
+- prediction: what will likely happen next (be specific)
+- evidence: list of evidence strings (log excerpts, values)
+- preventive_action: concrete step to prevent escalation
+- time_horizon: "minutes", "hours", or "eventual\""""
+
+RISK_LEVEL_GUIDELINES = """\
+- HIGH: Imminent failure likely (accelerating errors, resources near exhaustion)
+- MEDIUM: Degradation probable if trend continues (slow climb, intermittent warnings)
+- LOW: Worth monitoring but not urgent (single signals, stable patterns)"""
+
+SYSTEM_PROMPT = f"""\
 You are a Predictive Risk Agent for a DevOps incident analysis pipeline.
 
 You receive detected escalation signals from log analysis. Each signal includes:
@@ -21,17 +44,10 @@ You receive detected escalation signals from log analysis. Each signal includes:
 Your job is to assess each signal and predict what will happen next if no action is taken.
 
 For each risk prediction, return:
-- service: affected service name
-- risk_level: HIGH, MEDIUM, or LOW
-- prediction: what will likely happen next (be specific)
-- evidence: list of evidence strings (log excerpts, values)
-- preventive_action: concrete step to prevent escalation
-- time_horizon: "minutes", "hours", or "eventual"
+{RISK_FIELDS}
 
 Risk level guidelines:
-- HIGH: Imminent failure likely (accelerating errors, resources near exhaustion)
-- MEDIUM: Degradation probable if trend continues (slow climb, intermittent warnings)
-- LOW: Worth monitoring but not urgent (single signals, stable patterns)
+{RISK_LEVEL_GUIDELINES}
 
 Return a JSON array. If no risks are predicted, return [].
 Do NOT wrap the JSON in markdown code fences. Return ONLY valid JSON.
@@ -46,6 +62,18 @@ NUMERIC_PATTERNS = {
     "rate_value": re.compile(r"(\d+)/(\d+)\s*req", re.IGNORECASE),
 }
 
+# Most distinctive literal each NUMERIC_PATTERNS match must contain (checked
+# against the lowercased message). The patterns all lead with (\d+), so the
+# regex engine has no literal prefix to skip ahead on — a substring test on
+# the literal rejects non-matching messages far more cheaply.
+NUMERIC_PREFILTERS = {
+    "disk_percent": "%",
+    "latency_ms": "ms",
+    "retry_count": "retry",
+    "pool_usage": "connection",
+    "rate_value": "req",
+}
+
 # Known escalation pattern signatures
 KNOWN_PATTERNS = {
     "brute_force": re.compile(
@@ -57,67 +85,186 @@ KNOWN_PATTERNS = {
     "circuit_breaker": re.compile(r"(circuit\s*breaker|retries?\s*exhausted)", re.IGNORECASE),
 }
 
-
-def _parse_timestamp(ts: str) -> datetime | None:
-    """Parse a YYYY-MM-DD HH:MM:SS timestamp."""
-    try:
-        return datetime.strptime(ts.strip(), "%Y-%m-%d %H:%M:%S")
-    except (ValueError, AttributeError):
+# Current/total ratio inside a pool-utilization message (e.g. "48/50")
+_RATIO_RE = re.compile(r"(\d+)/(\d+)")
+
+# Detectors only need recent trend evidence, so a noisy service is capped to
+# its most recent actionable entries to bound per-service work
+_MAX_ENTRIES_PER_SERVICE = 200
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _count_decreasing_gaps(offsets: np.ndarray) -> int:
+        """Count gaps between sorted timestamps that are shorter than the gap before them."""
+        n = offsets.shape[0]
+        if n < 3:
+            return 0
+        decreasing = 0
+        prev_gap = offsets[1] - offsets[0]
+        for i in range(2, n):
+            gap = offsets[i] - offsets[i - 1]
+            if gap < prev_gap:
+                decreasing += 1
+            prev_gap = gap
+        return decreasing
+else:
+    def _count_decreasing_gaps(offsets: np.ndarray) -> int:
+        """Count gaps between sorted timestamps that are shorter than the gap before them."""
+        gaps = np.diff(offsets)
+        return int(np.count_nonzero(gaps[1:] < gaps[:-1]))
+
+
+def _frequency_acceleration_signal(
+    service: str, dts: list[datetime], timed_entries: list[dict]
+) -> dict | None:
+    """Flag a service whose WARN/ERROR entries are arriving at an increasing rate.
+
+    `dts` and `timed_entries` are parallel lists in log order.
+    """
+    if len(dts) < 3:
         return None
 
+    # Seconds offsets (naive datetimes, so no local-time/DST shifts), sorted
+    # with one stable C-level argsort
+    ref = dts[0]
+    offsets = np.fromiter(
+        ((dt - ref).total_seconds() for dt in dts), dtype=np.float64, count=len(dts)
+    )
+    order = np.argsort(offsets, kind="stable")
+    offsets = offsets[order]
+
+    # Check if gaps between consecutive entries are decreasing (acceleration)
+    decreasing = _count_decreasing_gaps(offsets)
+    if decreasing >= (len(offsets) - 1) // 2 and decreasing >= 1:
+        gaps = np.diff(offsets)
+        evidence = [
+            f"Event gaps: {[f'{g:.0f}s' for g in gaps]}",
+            f"Latest entries: {[timed_entries[i].get('message', '')[:80] for i in order[-3:]]}",
+        ]
+        return {
+            "service": service,
+            "signal_type": "frequency_acceleration",
+            "evidence": evidence,
+            "entry_count": len(dts),
+        }
 
-def _detect_frequency_acceleration(entries_by_service: dict[str, list[dict]]) -> list[dict]:
-    """Detect services where WARN/ERROR entries are arriving at an increasing rate."""
-    signals = []
+    return None
 
-    for service, entries in entries_by_service.items():
-        timestamps = []
-        for e in entries:
-            dt = _parse_timestamp(e.get("timestamp", ""))
-            if dt:
-                timestamps.append((dt, e))
-        timestamps.sort(key=lambda x: x[0])
-
-        if len(timestamps) < 3:
-            continue
-
-        # Compute gaps between consecutive entries
-        gaps = []
-        for i in range(1, len(timestamps)):
-            gap = (timestamps[i][0] - timestamps[i - 1][0]).total_seconds()
-            gaps.append(gap)
-
-        # Check if gaps are decreasing (acceleration)
-        if len(gaps) >= 2:
-            decreasing = sum(1 for i in range(1, len(gaps)) if gaps[i] < gaps[i - 1])
-            if decreasing >= len(gaps) // 2 and decreasing >= 1:
-                evidence = [
-                    f"Event gaps: {[f'{g:.0f}s' for g in gaps]}",
-                    f"Latest entries: {[e.get('message', '')[:80] for _, e in timestamps[-3:]]}",
-                ]
+
+def _numeric_trend_signals(service: str, pattern_values: dict[str, list[tuple[str, float]]]) -> list[dict]:
+    """Report metrics whose extracted values trend upward (at least 2 values, last > first)."""
+    signals = []
+    for name, values in pattern_values.items():
+        if len(values) >= 2:
+            first_val = values[0][1]
+            last_val = values[-1][1]
+            if last_val > first_val:
                 signals.append({
                     "service": service,
-                    "signal_type": "frequency_acceleration",
-                    "evidence": evidence,
-                    "entry_count": len(timestamps),
+                    "signal_type": "numeric_trend",
+                    "metric": name,
+                    "evidence": [
+                        f"{name}: {first_val} -> {last_val} (trending up)",
+                        f"From entries at {values[0][0]} to {values[-1][0]}",
+                    ],
                 })
-
     return signals
 
 
-def _detect_numeric_trends(entries_by_service: dict[str, list[dict]]) -> list[dict]:
-    """Extract numeric values from log messages and detect upward trends."""
+def _known_pattern_signals(
+    service: str,
+    auth_failures: list[str],
+    disk_hit: tuple[int, str] | None,
+    pool_hit: tuple[int, int, str] | None,
+    circuit_hit: str | None,
+) -> list[dict]:
+    """Turn the known-signature hits collected for a service into signals."""
     signals = []
 
+    # Brute force: 3+ auth failures in service's entries
+    if len(auth_failures) >= 3:
+        signals.append({
+            "service": service,
+            "signal_type": "known_pattern",
+            "pattern": "brute_force",
+            "evidence": [
+                f"{len(auth_failures)} auth failure entries detected",
+                f"Sample: {auth_failures[0][:80]}",
+            ],
+        })
+
+    # Disk usage > 80% (one signal per service per pattern)
+    if disk_hit:
+        pct, msg = disk_hit
+        signals.append({
+            "service": service,
+            "signal_type": "known_pattern",
+            "pattern": "disk_critical",
+            "evidence": [
+                f"Disk usage at {pct}% (threshold: 80%)",
+                f"Entry: {msg[:80]}",
+            ],
+        })
+
+    # Connection pool > 75%
+    if pool_hit:
+        current, total, msg = pool_hit
+        signals.append({
+            "service": service,
+            "signal_type": "known_pattern",
+            "pattern": "pool_exhaustion",
+            "evidence": [
+                f"Pool at {current}/{total} ({100 * current // total}%)",
+                f"Entry: {msg[:80]}",
+            ],
+        })
+
+    # Circuit breaker / retries exhausted
+    if circuit_hit is not None:
+        signals.append({
+            "service": service,
+            "signal_type": "known_pattern",
+            "pattern": "circuit_breaker",
+            "evidence": [
+                f"Circuit breaker or retry exhaustion detected",
+                f"Entry: {circuit_hit[:80]}",
+            ],
+        })
+
+    return signals
+
+
+def _detect_all(entries_by_service: dict[str, list[dict]]) -> tuple[list[dict], list[dict], list[dict]]:
+    """Run all three detectors in a single pass over each service's entries.
+
+    Returns (frequency_signals, trend_signals, pattern_signals).
+    """
+    freq_signals: list[dict] = []
+    trend_signals: list[dict] = []
+    pattern_signals: list[dict] = []
+
     for service, entries in entries_by_service.items():
-        # Collect numeric values per pattern
+        dts: list[datetime] = []
+        timed_entries: list[dict] = []
         pattern_values: dict[str, list[tuple[str, float]]] = defaultdict(list)
+        auth_failures: list[str] = []
+        disk_hit = pool_hit = circuit_hit = None
 
         for e in entries:
             msg = e.get("message", "")
+            msg_lower = msg.lower()
             ts = e.get("timestamp", "")
 
+            dt = parse_timestamp(ts)
+            if dt:
+                dts.append(dt)
+                timed_entries.append(e)
+
+            # Numeric values per pattern
             for name, pattern in NUMERIC_PATTERNS.items():
+                if NUMERIC_PREFILTERS[name] not in msg_lower:
+                    continue
                 match = pattern.search(msg)
                 if match:
                     try:
@@ -126,113 +273,51 @@ def _detect_numeric_trends(entries_by_service: dict[str, list[dict]]) -> list[di
                     except (ValueError, IndexError):
                         pass
 
-        # Check for upward trends (at least 2 values, last > first)
-        for name, values in pattern_values.items():
-            if len(values) >= 2:
-                first_val = values[0][1]
-                last_val = values[-1][1]
-                if last_val > first_val:
-                    signals.append({
-                        "service": service,
-                        "signal_type": "numeric_trend",
-                        "metric": name,
-                        "evidence": [
-                            f"{name}: {first_val} -> {last_val} (trending up)",
-                            f"From entries at {values[0][0]} to {values[-1][0]}",
-                        ],
-                    })
-
-    return signals
-
-
-def _detect_known_patterns(entries_by_service: dict[str, list[dict]]) -> list[dict]:
-    """Match against known escalation signatures."""
-    signals = []
+            # Known signatures — cheap substring checks gate each regex
+            if "fail" in msg_lower or "brute" in msg_lower or "locked" in msg_lower:
+                if KNOWN_PATTERNS["brute_force"].search(msg):
+                    auth_failures.append(msg)
 
-    for service, entries in entries_by_service.items():
-        # Brute force: 3+ auth failures in service's entries
-        auth_failures = [
-            e for e in entries if KNOWN_PATTERNS["brute_force"].search(e.get("message", ""))
-        ]
-        if len(auth_failures) >= 3:
-            signals.append({
-                "service": service,
-                "signal_type": "known_pattern",
-                "pattern": "brute_force",
-                "evidence": [
-                    f"{len(auth_failures)} auth failure entries detected",
-                    f"Sample: {auth_failures[0].get('message', '')[:80]}",
-                ],
-            })
-
-        # Disk usage > 80%
-        for e in entries:
-            disk_match = KNOWN_PATTERNS["disk_critical"].search(e.get("message", ""))
-            if disk_match:
-                try:
-                    pct = int(disk_match.group(1))
-                    if pct > 80:
-                        signals.append({
-                            "service": service,
-                            "signal_type": "known_pattern",
-                            "pattern": "disk_critical",
-                            "evidence": [
-                                f"Disk usage at {pct}% (threshold: 80%)",
-                                f"Entry: {e.get('message', '')[:80]}",
-                            ],
-                        })
-                        break  # One signal per service per pattern
-                except (ValueError, IndexError):
-                    pass
-
-        # Connection pool > 75%
-        for e in entries:
-            pool_match = KNOWN_PATTERNS["pool_exhaustion"].search(e.get("message", ""))
-            if pool_match:
-                # Try to extract ratio
-                ratio_match = re.search(r"(\d+)/(\d+)", e.get("message", ""))
-                if ratio_match:
+            if disk_hit is None and "disk" in msg_lower:
+                disk_match = KNOWN_PATTERNS["disk_critical"].search(msg)
+                if disk_match:
                     try:
-                        current = int(ratio_match.group(1))
-                        total = int(ratio_match.group(2))
-                        if total > 0 and (current / total) > 0.75:
-                            signals.append({
-                                "service": service,
-                                "signal_type": "known_pattern",
-                                "pattern": "pool_exhaustion",
-                                "evidence": [
-                                    f"Pool at {current}/{total} ({100 * current // total}%)",
-                                    f"Entry: {e.get('message', '')[:80]}",
-                                ],
-                            })
-                            break
+                        pct = int(disk_match.group(1))
+                        if pct > 80:
+                            disk_hit = (pct, msg)
                     except (ValueError, IndexError):
                         pass
 
-        # Circuit breaker / retries exhausted
-        for e in entries:
-            if KNOWN_PATTERNS["circuit_breaker"].search(e.get("message", "")):
-                signals.append({
-                    "service": service,
-                    "signal_type": "known_pattern",
-                    "pattern": "circuit_breaker",
-                    "evidence": [
-                        f"Circuit breaker or retry exhaustion detected",
-                        f"Entry: {e.get('message', '')[:80]}",
-                    ],
-                })
-                break
-
-    return signals
-
-
-def run(state: dict, llm) -> dict:
-    """Detect escalation signals and predict risks."""
-    log_entries = state.get("log_entries", [])
-
-    if not log_entries:
-        return {"risk_predictions": [], "current_agent": "predictive_risk"}
-
+            if pool_hit is None and "pool" in msg_lower:
+                if KNOWN_PATTERNS["pool_exhaustion"].search(msg):
+                    # Try to extract ratio
+                    ratio_match = _RATIO_RE.search(msg)
+                    if ratio_match:
+                        try:
+                            current = int(ratio_match.group(1))
+                            total = int(ratio_match.group(2))
+                            if total > 0 and (current / total) > 0.75:
+                                pool_hit = (current, total, msg)
+                        except (ValueError, IndexError):
+                            pass
+
+            if circuit_hit is None and ("circuit" in msg_lower or "retri" in msg_lower):
+                if KNOWN_PATTERNS["circuit_breaker"].search(msg):
+                    circuit_hit = msg
+
+        freq_signal = _frequency_acceleration_signal(service, dts, timed_entries)
+        if freq_signal:
+            freq_signals.append(freq_signal)
+        trend_signals.extend(_numeric_trend_signals(service, pattern_values))
+        pattern_signals.extend(
+            _known_pattern_signals(service, auth_failures, disk_hit, pool_hit, circuit_hit)
+        )
+
+    return freq_signals, trend_signals, pattern_signals
+
+
+def collect_signals(log_entries: list[dict]) -> list[dict]:
+    """Group WARN/ERROR/CRITICAL entries by service and run the escalation detectors."""
     # Group entries by service (WARN/ERROR/CRITICAL only)
     actionable_levels = {"CRITICAL", "ERROR", "WARN", "WARNING"}
     entries_by_service: dict[str, list[dict]] = defaultdict(list)
@@ -242,32 +327,23 @@ def run(state: dict, llm) -> dict:
             entries_by_service[svc].append(e)
 
     if not entries_by_service:
-        return {"risk_predictions": [], "current_agent": "predictive_risk"}
-
-    # Run all three detectors
-    freq_signals = _detect_frequency_acceleration(entries_by_service)
-    trend_signals = _detect_numeric_trends(entries_by_service)
-    pattern_signals = _detect_known_patterns(entries_by_service)
+        return []
 
-    all_signals = freq_signals + trend_signals + pattern_signals
+    for svc, entries in entries_by_service.items():
+        if len(entries) > _MAX_ENTRIES_PER_SERVICE:
+            entries_by_service[svc] = entries[-_MAX_ENTRIES_PER_SERVICE:]
 
-    if not all_signals:
-        return {"risk_predictions": [], "current_agent": "predictive_risk"}
+    # Run all three detectors in one pass per service
+    freq_signals, trend_signals, pattern_signals = _detect_all(entries_by_service)
 
-    # Send to LLM for risk assessment
-    signals_text = json.dumps(all_signals, indent=2, default=str)
+    return freq_signals + trend_signals + pattern_signals
 
-    response = llm.invoke([
-        SystemMessage(content=SYSTEM_PROMPT),
-        HumanMessage(
-            content=f"Assess these escalation signals and predict risks:\n\n{signals_text}"
-        ),
-    ])
 
-    text = response.content.strip()
+def parse_response(text: str) -> dict:
+    """Parse and normalize the LLM's risk assessment into a state update."""
+    text = text.strip()
     if text.startswith("```"):
-        text = re.sub(r"^```\w*\n?", "", text)
-        text = re.sub(r"\n?```$", "", text)
+        text = FENCE_RE.sub("", text)
 
     try:
         parsed = json.loads(text)
@@ -295,3 +371,28 @@ def run(state: dict, llm) -> dict:
         })
 
     return {"risk_predictions": predictions, "current_agent": "predictive_risk"}
+
+
+def run(state: dict, llm) -> dict:
+    """Detect escalation signals and predict risks."""
+    log_entries = state.get("log_entries", [])
+
+    if not log_entries:
+        return {"risk_predictions": [], "current_agent": "predictive_risk"}
+
+    all_signals = collect_signals(log_entries)
+
+    if not all_signals:
+        return {"risk_predictions": [], "current_agent": "predictive_risk"}
+
+    # Send to LLM for risk assessment
+    signals_text = json.dumps(all_signals, separators=(",", ":"), default=str)
+
+    response = llm.invoke([
+        SystemMessage(content=SYSTEM_PROMPT),
+        HumanMessage(
+            content=f"Assess these escalation signals and predict risks:\n\n{signals_text}"
+        ),
+    ])
+
+    return parse_response(response.content)
@@ -3,108 +3,153 @@
 from __future__ import annotations
 
 import json
-import re
+import sys
 from collections import defaultdict
-from datetime import datetime
+
+import numpy as np
+
+try:
+    import ahocorasick
+except ImportError:  # optional: fall back to a per-service substring scan
+    ahocorasick = None
 
 from langchain_core.messages import SystemMessage, HumanMessage
 
+from utils.llm_text import FENCE_RE
+from utils.timestamps import parse_timestamp
+
 
 # Default time window (seconds) for grouping related events
 TIME_WINDOW = 60
 
-SYSTEM_PROMPT = """\
-You are a Root Cause Correlator Agent for a DevOps incident analysis pipeline.
+# Cross-referencing only scans the most recent actionable entries
+_MAX_CROSS_REF_ENTRIES = 1000
 
-You receive clusters of temporally-close, cross-referenced log events.
-Your job is to identify directed causal chains — which event caused which.
-
-For each causal chain you find, return:
+# Output schema and confidence levels, shared with the combined agent's prompt
+CHAIN_FIELDS = """\
 - chain: ordered list of events (earliest/root first), each with service, event, timestamp, line_number
 - root_cause: description of the originating event
 - blast_radius: number of distinct services affected
 - affected_services: list of service names
 - confidence: HIGH, MEDIUM, or LOW
-- summary: one plain-English sentence explaining the chain
+- summary: one plain-English sentence explaining the chain"""
 
-Confidence guidelines:
+CONFIDENCE_GUIDELINES = """\
 - HIGH: Clear temporal ordering + explicit cross-service references in log messages
 - MEDIUM: Temporal correlation exists but causation is inferred
-- LOW: Events are in the same time window but causal link is uncertain
+- LOW: Events are in the same time window but causal link is uncertain"""
+
+SYSTEM_PROMPT = f"""\
+You are a Root Cause Correlator Agent for a DevOps incident analysis pipeline.
+
+You receive clusters of temporally-close, cross-referenced log events.
+Your job is to identify directed causal chains — which event caused which.
+
+For each causal chain you find, return:
+{CHAIN_FIELDS}
+
+Confidence guidelines:
+{CONFIDENCE_GUIDELINES}
 
 Return a JSON array of chain objects. If events are independent (no causal link), return an empty array [].
 Do NOT wrap the JSON in markdown code fences. Return ONLY valid JSON.
 """
 
 
-def _parse_timestamp(ts: str) -> datetime | None:
-    """Parse a YYYY-MM-DD HH:MM:SS timestamp. Returns None on failure."""
-    try:
-        return datetime.strptime(ts.strip(), "%Y-%m-%d %H:%M:%S")
-    except (ValueError, AttributeError):
-        return None
-
-
 def _build_time_groups(entries: list[dict], window: int = TIME_WINDOW) -> list[list[dict]]:
     """Group entries that fall within `window` seconds of each other."""
-    # Sort by timestamp
-    timed = []
+    dts = []
+    timed_entries = []
     for e in entries:
-        dt = _parse_timestamp(e.get("timestamp", ""))
+        dt = parse_timestamp(e.get("timestamp", ""))
         if dt:
-            timed.append((dt, e))
-    timed.sort(key=lambda x: x[0])
+            dts.append(dt)
+            timed_entries.append(e)
 
-    if not timed:
+    if not timed_entries:
         return []
 
-    groups: list[list[dict]] = []
-    current_group = [timed[0][1]]
-    group_start = timed[0][0]
-
-    for dt, entry in timed[1:]:
-        if (dt - group_start).total_seconds() <= window:
-            current_group.append(entry)
-        else:
-            if len(current_group) >= 2:
-                groups.append(current_group)
-            current_group = [entry]
-            group_start = dt
+    # Sort by timestamp: seconds offsets (naive datetimes, no DST shifts) and
+    # one stable C-level argsort instead of a Python key per comparison
+    ref = dts[0]
+    offsets = np.fromiter(
+        ((dt - ref).total_seconds() for dt in dts), dtype=np.float64, count=len(dts)
+    )
+    order = np.argsort(offsets, kind="stable")
+    offsets = offsets[order]
 
-    if len(current_group) >= 2:
-        groups.append(current_group)
+    # Each group runs from its first entry up to `window` seconds after it
+    groups: list[list[dict]] = []
+    start = 0
+    while start < len(order):
+        end = int(np.searchsorted(offsets, offsets[start] + window, side="right"))
+        if end - start >= 2:
+            groups.append([timed_entries[i] for i in order[start:end]])
+        start = end
 
     return groups
 
 
 def _find_cross_references(entries: list[dict], all_services: set[str]) -> list[list[dict]]:
-    """Find entries that mention other services in their message text."""
-    cross_ref_clusters: dict[str, set[int]] = defaultdict(set)
-
+    """Find entries that mention other services in their message text.
+
+    Entries are clustered with a union-find: each referencing entry is joined
+    to a node for every service it mentions (not its own), so entries that
+    point at the same service share a cluster. Each connected component of
+    2+ entries becomes a cluster.
+    """
+    # Lowercase each distinct service name once, not once per entry
+    lowered = {svc: svc.lower() for svc in all_services}
+    service_names = set(lowered.values())
+
+    # One Aho-Corasick pass per message instead of one substring search per service
+    automaton = None
+    if ahocorasick is not None and service_names:
+        automaton = ahocorasick.Automaton()
+        for name in service_names:
+            automaton.add_word(name, name)
+        automaton.make_automaton()
+
+    # Nodes 0..len(entries)-1 are entries; service nodes are appended on demand
+    parent = list(range(len(entries)))
+    service_nodes: dict[str, int] = {}
+
+    def find(x: int) -> int:
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    linked = []
     for i, entry in enumerate(entries):
         msg = entry.get("message", "").lower()
-        entry_service = entry.get("service", "").lower()
-        for svc in all_services:
-            if svc.lower() != entry_service and svc.lower() in msg:
-                # This entry references another service
-                cross_ref_clusters[svc.lower()].add(i)
-                cross_ref_clusters[entry_service].add(i)
-
-    # Build clusters of cross-referencing entries
-    if not cross_ref_clusters:
-        return []
+        svc = entry.get("service", "")
+        entry_service = lowered.get(svc)
+        if entry_service is None:
+            entry_service = lowered[svc] = svc.lower()
+        if automaton is not None:
+            mentioned = {name for _, name in automaton.iter(msg)}
+        else:
+            mentioned = {name for name in service_names if name in msg}
+        mentioned.discard(entry_service)
+        if not mentioned:
+            continue
+
+        # This entry references another service
+        linked.append(i)
+        for name in mentioned:
+            node = service_nodes.get(name)
+            if node is None:
+                node = service_nodes[name] = len(parent)
+                parent.append(node)
+            parent[find(i)] = find(node)
 
-    seen: set[int] = set()
-    clusters = []
-    for indices in cross_ref_clusters.values():
-        cluster_indices = indices - seen
-        if len(cluster_indices) >= 2:
-            cluster = [entries[i] for i in sorted(cluster_indices) if i < len(entries)]
-            if len(cluster) >= 2:
-                clusters.append(cluster)
-                seen.update(cluster_indices)
+    # Build clusters of cross-referencing entries (linked is in entry order)
+    components: dict[int, list[int]] = defaultdict(list)
+    for i in linked:
+        components[find(i)].append(i)
 
-    return clusters
+    return [[entries[i] for i in indices] for indices in components.values() if len(indices) >= 2]
 
 
 def _merge_candidates(time_groups: list[list[dict]], cross_refs: list[list[dict]]) -> list[list[dict]]:
@@ -114,87 +159,64 @@ def _merge_candidates(time_groups: list[list[dict]], cross_refs: list[list[dict]
 
     # Use all candidates, deduplicate by entry line numbers
     candidates = []
-    seen_sets: list[set[int]] = []
+    seen: set[frozenset[int]] = set()
 
     # Cross-referenced groups that also overlap temporally are strongest
+    tg_line_sets = [{e.get("line_number", 0) for e in tg} for tg in time_groups]
     for cluster in cross_refs:
         line_nums = {e.get("line_number", 0) for e in cluster}
-        for tg in time_groups:
-            tg_lines = {e.get("line_number", 0) for e in tg}
+        for tg, tg_lines in zip(time_groups, tg_line_sets):
             overlap = line_nums & tg_lines
             if len(overlap) >= 2:
                 merged = {e.get("line_number", 0): e for e in cluster + tg}
-                merged_entries = list(merged.values())
-                merged_set = set(merged.keys())
-                if merged_set not in seen_sets:
-                    candidates.append(merged_entries)
-                    seen_sets.append(merged_set)
+                key = frozenset(merged)
+                if key not in seen:
+                    candidates.append(list(merged.values()))
+                    seen.add(key)
 
     # If no overlap, use cross-refs (stronger signal than time alone)
     if not candidates:
         for cluster in cross_refs:
-            line_nums = {e.get("line_number", 0) for e in cluster}
-            if line_nums not in seen_sets:
+            key = frozenset(e.get("line_number", 0) for e in cluster)
+            if key not in seen:
                 candidates.append(cluster)
-                seen_sets.append(line_nums)
+                seen.add(key)
 
     # Add time groups that aren't already covered
     if not candidates:
         for tg in time_groups:
-            line_nums = {e.get("line_number", 0) for e in tg}
-            if line_nums not in seen_sets:
+            key = frozenset(e.get("line_number", 0) for e in tg)
+            if key not in seen:
                 candidates.append(tg)
-                seen_sets.append(line_nums)
+                seen.add(key)
 
     return candidates
 
 
-def run(state: dict, llm) -> dict:
-    """Identify causal chains from log entries and issues."""
-    log_entries = state.get("log_entries", [])
-    issues = state.get("issues", [])
-
-    if not log_entries:
-        return {"causal_chains": [], "current_agent": "root_cause"}
-
+def collect_candidates(log_entries: list[dict]) -> list[list[dict]]:
+    """Build candidate event clusters from time-window grouping and service cross-referencing."""
     # Filter to actionable entries
     actionable_levels = {"CRITICAL", "ERROR", "WARN", "WARNING"}
     actionable = [e for e in log_entries if e.get("level", "") in actionable_levels]
 
     if len(actionable) < 2:
-        return {"causal_chains": [], "current_agent": "root_cause"}
+        return []
 
     # Collect all service names
-    all_services = {e.get("service", "") for e in log_entries if e.get("service", "")}
+    all_services = {sys.intern(e.get("service", "")) for e in log_entries if e.get("service", "")}
     all_services.discard("unknown")
 
     # Deterministic: time-window grouping + service cross-referencing
     time_groups = _build_time_groups(actionable)
-    cross_refs = _find_cross_references(actionable, all_services)
-    candidates = _merge_candidates(time_groups, cross_refs)
-
-    if not candidates:
-        return {"causal_chains": [], "current_agent": "root_cause"}
+    cross_refs = _find_cross_references(actionable[-_MAX_CROSS_REF_ENTRIES:], all_services)
+    return _merge_candidates(time_groups, cross_refs)
 
-    # Send candidates to LLM for causal reasoning
-    candidates_text = json.dumps(candidates, indent=2, default=str)
-    issues_text = json.dumps(issues[:10], indent=2, default=str) if issues else "[]"
 
-    response = llm.invoke([
-        SystemMessage(content=SYSTEM_PROMPT),
-        HumanMessage(
-            content=(
-                f"Analyze these correlated event clusters and identify causal chains:\n\n"
-                f"Event clusters:\n{candidates_text}\n\n"
-                f"Known issues for context:\n{issues_text}"
-            )
-        ),
-    ])
-
-    text = response.content.strip()
+def parse_response(text: str) -> dict:
+    """Parse and normalize the LLM's causal chains into a state update."""
+    text = text.strip()
     if text.startswith("```"):
-        text = re.sub(r"^```\w*\n?", "", text)
-        text = re.sub(r"\n?```$", "", text)
+        text = FENCE_RE.sub("", text)
 
     try:
         parsed = json.loads(text)
@@ -232,3 +254,34 @@ def run(state: dict, llm) -> dict:
         })
 
     return {"causal_chains": chains, "current_agent": "root_cause"}
+
+
+def run(state: dict, llm) -> dict:
+    """Identify causal chains from log entries and issues."""
+    log_entries = state.get("log_entries", [])
+    issues = state.get("issues", [])
+
+    if not log_entries:
+        return {"causal_chains": [], "current_agent": "root_cause"}
+
+    candidates = collect_candidates(log_entries)
+
+    if not candidates:
+        return {"causal_chains": [], "current_agent": "root_cause"}
+
+    # Send candidates to LLM for causal reasoning
+    candidates_text = json.dumps(candidates, separators=(",", ":"), default=str)
+    issues_text = json.dumps(issues[:10], separators=(",", ":"), default=str) if issues else "[]"
+
+    response = llm.invoke([
+        SystemMessage(content=SYSTEM_PROMPT),
+        HumanMessage(
+            content=(
+                f"Analyze these correlated event clusters and identify causal chains:\n\n"
+                f"Event clusters:\n{candidates_text}\n\n"
+                f"Known issues for context:\n{issues_text}"
+            )
+        ),
+    ])
+
+    return parse_response(response.content)
@@ -16,7 +16,7 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from graph import run_pipeline
 from models.schemas import Severity
 from utils.watcher import start_watcher, stop_watcher
-from utils.results_store import save_result, load_results, SEVERITY_ORDER
+from utils.results_store import save_result, load_results, load_full, SEVERITY_ORDER
 
 
 # --- Page Config ---
@@ -198,13 +198,13 @@ dashboard_results = load_results(from_date, to_date)
 
 # Summary metrics
 total_incidents = len(dashboard_results)
-total_issues = sum(len(r.get("issues", [])) for r in dashboard_results)
+total_issues = sum(r.get("issue_count", 0) for r in dashboard_results)
 total_crit_high = sum(
-    1 for r in dashboard_results
-    for issue in r.get("issues", [])
-    if issue.get("severity") in ("CRITICAL", "HIGH")
+    count for r in dashboard_results
+    for sev, count in r.get("severity_counts", {}).items()
+    if sev in ("CRITICAL", "HIGH")
 )
-total_chains = sum(len(r.get("causal_chains", [])) for r in dashboard_results)
+total_chains = sum(r.get("chain_count", 0) for r in dashboard_results)
 
 mc1, mc2, mc3, mc4 = st.columns(4)
 mc1.metric("Total Incidents", total_incidents)
@@ -218,15 +218,15 @@ if dashboard_results:
         fname = dr.get("filename", "unknown")
         processed_at = dr.get("processed_at", "unknown")
         source = dr.get("source", "unknown")
-        n_issues = len(dr.get("issues", []))
-        n_chains = len(dr.get("causal_chains", []))
-        n_risks = len(dr.get("risk_predictions", []))
+        n_issues = dr.get("issue_count", 0)
+        n_chains = dr.get("chain_count", 0)
+        n_risks = dr.get("risk_count", 0)
         proc_time = dr.get("processing_time_seconds", "?")
 
         # Highest severity
-        issues = dr.get("issues", [])
+        sev_counts = dr.get("severity_counts", {})
         highest = min(
-            (i.get("severity", "LOW") for i in issues),
+            sev_counts,
             key=lambda s: SEVERITY_ORDER.get(s, 4),
             default=None,
         )
@@ -253,17 +253,17 @@ if dashboard_results:
             )
 
             # Severity distribution
-            sev_counts = {}
-            for issue in issues:
-                s = issue.get("severity", "LOW")
-                sev_counts[s] = sev_counts.get(s, 0) + 1
             if sev_counts:
                 dist_parts = [f"{k}: {v}" for k, v in sorted(sev_counts.items(), key=lambda x: SEVERITY_ORDER.get(x[0], 4))]
                 st.caption(f"Severity breakdown: {' | '.join(dist_parts)}")
 
             if st.button("Load Full Results", key=f"dash_load_{idx}"):
-                st.session_state["result"] = dr
-                st.rerun()
+                full = load_full(dr["_result_file"])
+                if full is None:
+                    st.error("Could not read the saved result file.")
+                else:
+                    st.session_state["result"] = full
+                    st.rerun()
 else:
     st.info("No incidents found in the selected date range.")
 
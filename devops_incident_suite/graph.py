@@ -10,8 +10,7 @@ from dotenv import load_dotenv
 from langgraph.graph import StateGraph, END
 
 from agents import (
-    log_classifier, remediation, cookbook, jira_ticket, notification,
-    root_cause, predictive_risk,
+    log_classifier, remediation, cookbook, jira_ticket, combined_llm,
 )
 
 
@@ -109,16 +108,8 @@ def jira_ticket_node(state: dict) -> dict:
     return jira_ticket.run(state, _get_shared_llm())
 
 
-def notification_node(state: dict) -> dict:
-    return notification.run(state, _get_shared_llm())
-
-
-def root_cause_node(state: dict) -> dict:
-    return root_cause.run(state, _get_shared_llm())
-
-
-def predictive_risk_node(state: dict) -> dict:
-    return predictive_risk.run(state, _get_shared_llm())
+def combined_llm_node(state: dict) -> dict:
+    return combined_llm.run(state, _get_shared_llm())
 
 
 # --- Graph Definition ---
@@ -127,11 +118,12 @@ def build_graph() -> StateGraph:
     """Build and compile the LangGraph pipeline.
 
     Flow:
-        log_classifier → remediation → [cookbook, jira_ticket, root_cause, predictive_risk] (parallel)
-                                        cookbook ──────────→ END
-                                        jira_ticket ──────→ END
-                                        root_cause ───────→ END
-                                        predictive_risk ──→ notification → END
+        log_classifier → remediation → [cookbook, jira_ticket] (parallel)
+                                        cookbook ──→ combined_llm → END
+                                        jira_ticket ────────────→ END
+
+    combined_llm runs the predictive risk, root cause and notification
+    LLM tasks as one batched request (see agents/combined_llm.py).
     """
     graph = StateGraph(PipelineState)
 
@@ -140,28 +132,23 @@ def build_graph() -> StateGraph:
     graph.add_node("remediation", remediation_node)
     graph.add_node("cookbook", cookbook_node)
     graph.add_node("jira_ticket", jira_ticket_node)
-    graph.add_node("root_cause", root_cause_node)
-    graph.add_node("predictive_risk", predictive_risk_node)
-    graph.add_node("notification", notification_node)
+    graph.add_node("combined_llm", combined_llm_node)
 
     # Define edges: sequential then fan-out
     graph.set_entry_point("log_classifier")
     graph.add_edge("log_classifier", "remediation")
 
-    # Fan-out from remediation to four parallel agents
+    # Fan-out from remediation to two parallel agents
     graph.add_edge("remediation", "cookbook")
     graph.add_edge("remediation", "jira_ticket")
-    graph.add_edge("remediation", "root_cause")
-    graph.add_edge("remediation", "predictive_risk")
 
-    # Notification runs after predictive_risk (needs risk predictions for Slack)
-    graph.add_edge("predictive_risk", "notification")
+    # Batched risk/root-cause/notification call runs after cookbook
+    # (the Slack summary links a cookbook preview)
+    graph.add_edge("cookbook", "combined_llm")
 
     # All converge to END
-    graph.add_edge("cookbook", END)
     graph.add_edge("jira_ticket", END)
-    graph.add_edge("root_cause", END)
-    graph.add_edge("notification", END)
+    graph.add_edge("combined_llm", END)
 
     return graph.compile()
 
@@ -0,0 +1,8 @@
+"""Helpers for cleaning up raw LLM text responses."""
+
+from __future__ import annotations
+
+import re
+
+# Leading ```lang fence or trailing ``` fence around an LLM's JSON reply
+FENCE_RE = re.compile(r"^```\w*\n?|\n?```$")
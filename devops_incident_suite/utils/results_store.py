@@ -2,17 +2,176 @@
 
 from __future__ import annotations
 
+import hashlib
 import json
 import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
 from datetime import date, datetime, timezone
 
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib encoder/decoder
+    orjson = None
+
 _RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "results_history")
+_INDEX_PATH = os.path.join(_RESULTS_DIR, "_index.sqlite")
 
 SEVERITY_ORDER = {"CRITICAL": 0, "HIGH": 1, "MEDIUM": 2, "LOW": 3}
 
 
+def _write_json(path: str, data: dict) -> None:
+    """Write a result to `path` as indented UTF-8 JSON.
+
+    orjson encodes straight to one bytes buffer. The stdlib fallback streams
+    the encoder's chunks through a 1 MiB buffer rather than building the
+    whole document as a str first.
+    """
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, default=str, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+        return
+
+    with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+        json.dump(data, f, indent=2, default=str)
+
+
+def _loads(raw: bytes) -> dict:
+    """Decode a result file's bytes. Raises json.JSONDecodeError on bad input."""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+def _result_date(processed_at) -> date | None:
+    """Calendar date of an ISO `processed_at` value, or None if it can't be parsed."""
+    try:
+        return datetime.fromisoformat(processed_at).date()
+    except (ValueError, TypeError):
+        return None
+
+
+def _summarize(data: dict) -> dict:
+    """Build the dashboard listing row for a result (counts instead of full payloads)."""
+    issues = data.get("issues", [])
+    severity_counts: dict[str, int] = {}
+    for issue in issues:
+        sev = issue.get("severity", "LOW")
+        severity_counts[sev] = severity_counts.get(sev, 0) + 1
+
+    summary = {
+        k: data[k]
+        for k in ("filename", "processed_at", "source", "processing_time_seconds")
+        if k in data
+    }
+    summary["issue_count"] = len(issues)
+    summary["severity_counts"] = severity_counts
+    summary["chain_count"] = len(data.get("causal_chains", []))
+    summary["risk_count"] = len(data.get("risk_predictions", []))
+    return summary
+
+
+def _index_result(conn: sqlite3.Connection, result_file: str, data: dict) -> bool:
+    """Insert or refresh one result's row in the index. Returns False if it has no valid date."""
+    processed_at = data.get("processed_at", "")
+    result_date = _result_date(processed_at)
+    if result_date is None:
+        return False
+    conn.execute(
+        "INSERT OR REPLACE INTO results "
+        "(result_file, processed_at, processed_date, source, summary_json) VALUES (?, ?, ?, ?, ?)",
+        (
+            result_file,
+            processed_at,
+            result_date.isoformat(),
+            data.get("source", ""),
+            json.dumps(_summarize(data), default=str),
+        ),
+    )
+    return True
+
+
+def _read_result(result_file: str) -> dict | None:
+    """Read one result file from results_history/. Returns None if unreadable."""
+    try:
+        with open(os.path.join(_RESULTS_DIR, result_file), "rb") as f:
+            data = _loads(f.read())
+    except (json.JSONDecodeError, UnicodeDecodeError, OSError):
+        return None
+    return data if isinstance(data, dict) else None
+
+
+def _read_results(fnames: list[str]) -> list[dict | None]:
+    """Read several result files, in parallel when there are enough to be worth it."""
+    # Reads and parses overlap well across threads; skip the pool for a handful of files
+    if len(fnames) < 4:
+        return [_read_result(fname) for fname in fnames]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        return list(pool.map(_read_result, fnames))
+
+
+def _dir_signature(fnames: list[str]) -> str:
+    """Cheap fingerprint of the set of result files, to spot changes made outside this module."""
+    digest = hashlib.sha1("\n".join(sorted(fnames)).encode("utf-8")).hexdigest()
+    return f"{len(fnames)}:{digest}"
+
+
+def _sync_index(conn: sqlite3.Connection) -> None:
+    """Reconcile the index with results_history/ if the directory has changed.
+
+    New files are read and indexed (unreadable ones are recorded in `skipped`
+    so they aren't retried); rows for files that no longer exist are dropped.
+    Files already known to the index are never re-read.
+    """
+    fnames = [f for f in os.listdir(_RESULTS_DIR) if f.endswith(".results.json")]
+    signature = _dir_signature(fnames)
+    row = conn.execute("SELECT value FROM meta WHERE key = 'dir_signature'").fetchone()
+    if row is not None and row[0] == signature:
+        return
+
+    on_disk = set(fnames)
+    known = {
+        r[0] for r in conn.execute("SELECT result_file FROM results UNION SELECT result_file FROM skipped")
+    }
+
+    gone = [(f,) for f in known - on_disk]
+    conn.executemany("DELETE FROM results WHERE result_file = ?", gone)
+    conn.executemany("DELETE FROM skipped WHERE result_file = ?", gone)
+
+    missing = sorted(on_disk - known)
+    for fname, data in zip(missing, _read_results(missing)):
+        if data is None or not _index_result(conn, fname, data):
+            # Remember it so later syncs don't keep re-reading it
+            conn.execute("INSERT OR IGNORE INTO skipped (result_file) VALUES (?)", (fname,))
+
+    conn.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES ('dir_signature', ?)", (signature,)
+    )
+
+
+def _connect() -> sqlite3.Connection:
+    """Open the results index, creating its tables on first use."""
+    os.makedirs(_RESULTS_DIR, exist_ok=True)
+
+    conn = sqlite3.connect(_INDEX_PATH, timeout=10)
+    with conn:
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "result_file TEXT PRIMARY KEY, processed_at TEXT NOT NULL, "
+            "processed_date TEXT NOT NULL, source TEXT, summary_json TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS results_by_date ON results (processed_date, processed_at)"
+        )
+        # Result files that couldn't be indexed (unreadable or no valid processed_at)
+        conn.execute("CREATE TABLE IF NOT EXISTS skipped (result_file TEXT PRIMARY KEY)")
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+    return conn
+
+
 def save_result(result: dict, filename: str, source: str) -> str:
-    """Save a pipeline result to results_history/.
+    """Save a pipeline result to results_history/ and record it in the index.
 
     Adds `source` and `processed_at` if not already present.
     Returns the path to the saved file.
@@ -31,42 +190,46 @@ def save_result(result: dict, filename: str, source: str) -> str:
     out_name = f"{ts}_{safe_name}.results.json"
     out_path = os.path.join(_RESULTS_DIR, out_name)
 
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(result, f, indent=2, default=str)
+    _write_json(out_path, result)
+
+    with closing(_connect()) as conn, conn:
+        # Index the new file first so the sync below doesn't read it back
+        _index_result(conn, out_name, result)
+        _sync_index(conn)
 
     return out_path
 
 
 def load_results(from_date: date, to_date: date) -> list[dict]:
-    """Load results from results_history/ filtered by date range.
+    """List indexed results whose processed_at date falls in the range.
 
-    Returns a list of result dicts sorted by processed_at (newest first).
+    Returns summary rows (see `_summarize`) sorted by processed_at (newest
+    first), each with `_result_file` set. Use `load_full()` to read a
+    result's complete payload.
     """
     if not os.path.isdir(_RESULTS_DIR):
         return []
 
+    with closing(_connect()) as conn:
+        with conn:
+            _sync_index(conn)
+        rows = conn.execute(
+            "SELECT result_file, summary_json FROM results "
+            "WHERE processed_date BETWEEN ? AND ? ORDER BY processed_at DESC",
+            (from_date.isoformat(), to_date.isoformat()),
+        ).fetchall()
+
     results = []
-    for fname in os.listdir(_RESULTS_DIR):
-        if not fname.endswith(".results.json"):
-            continue
-
-        fpath = os.path.join(_RESULTS_DIR, fname)
-        try:
-            with open(fpath, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, OSError):
-            continue
-
-        processed_at = data.get("processed_at", "")
-        try:
-            dt = datetime.fromisoformat(processed_at)
-            result_date = dt.date()
-        except (ValueError, TypeError):
-            continue
-
-        if from_date <= result_date <= to_date:
-            data["_result_file"] = fname
-            results.append(data)
-
-    results.sort(key=lambda r: r.get("processed_at", ""), reverse=True)
+    for result_file, summary_json in rows:
+        summary = json.loads(summary_json)
+        summary["_result_file"] = result_file
+        results.append(summary)
     return results
+
+
+def load_full(result_file: str) -> dict | None:
+    """Load the complete saved result for a `_result_file` returned by `load_results()`."""
+    data = _read_result(os.path.basename(result_file))
+    if data is not None:
+        data["_result_file"] = result_file
+    return data
@@ -0,0 +1,32 @@
+"""Timestamp parsing shared by the correlation and risk agents."""
+
+from __future__ import annotations
+
+from datetime import datetime
+from functools import lru_cache
+
+
+@lru_cache(maxsize=4096)
+def parse_timestamp(ts: str) -> datetime | None:
+    """Parse a YYYY-MM-DD HH:MM:SS timestamp. Returns None on failure.
+
+    Log lines share timestamps heavily (many events per second), so results
+    are cached. The common fixed-width layout is sliced by hand, which is
+    several times faster than `strptime`; anything else goes through
+    `strptime` so the accepted formats are unchanged.
+    """
+    try:
+        s = ts.strip()
+        # int() would also accept signs and spaces, so require plain digits
+        digits = s[0:4] + s[5:7] + s[8:10] + s[11:13] + s[14:16] + s[17:19]
+        if (
+            len(s) == 19 and s[4] == "-" and s[7] == "-" and s[10] == " "
+            and s[13] == ":" and s[16] == ":" and digits.isascii() and digits.isdigit()
+        ):
+            return datetime(
+                int(s[0:4]), int(s[5:7]), int(s[8:10]),
+                int(s[11:13]), int(s[14:16]), int(s[17:19]),
+            )
+        return datetime.strptime(s, "%Y-%m-%d %H:%M:%S")
+    except (ValueError, AttributeError):
+        return None